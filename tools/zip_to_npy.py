@@ -0,0 +1,51 @@
+"""
+Convert a zip file with one numpy array per sample (as written by ZipNumpyWriter) into a single contiguous .npy file.
+Use the NumpyDatasetLoader for the converted file: Memory mapped samples are read as one contiguous block
+instead of decompressing a zip entry for each sample.
+Since the dataset loads every features file of an input path, the output file has to be placed in a different
+directory than the zip file.
+"""
+
+import argparse
+import os
+import zipfile
+
+import numpy as np
+from tqdm import tqdm
+
+from torch_src.loader import ZipNumpyDatasetLoader
+from util.preprocessing.data_writer import NumpyWriter
+
+
+def get_config():
+    parser = argparse.ArgumentParser(description="Convert zip-compressed samples to a single numpy file.")
+    parser.add_argument("-i", "--in_path", type=str, required=True, help="Path of the zip file")
+    parser.add_argument("-o", "--out_path", type=str, required=True,
+                        help="Path of the output file. Must be in a different directory than the zip file.")
+    parser.add_argument("--dtype", type=str,
+                        help="Output data type, e.g. float16. Samples are loaded as float32 (floating point input) "
+                             "or their original type (integer input) if unspecified.")
+    return parser.parse_args()
+
+
+def load_sample(data: zipfile.ZipFile, index: int) -> np.ndarray:
+    # noinspection PyProtectedMember
+    return ZipNumpyDatasetLoader._load_sample(data, f"s{index}")
+
+
+def convert(in_path: str, out_path: str, dtype: str = None):
+    assert os.path.dirname(os.path.abspath(in_path)) != os.path.dirname(os.path.abspath(out_path)), \
+        "The dataset would load both the zip file and the output file of the same input directory"
+    with zipfile.ZipFile(in_path) as data:
+        num_samples = len(data.namelist())
+        first = load_sample(data, 0)
+        shape = (num_samples, *first.shape)
+
+        with NumpyWriter(out_path, np.dtype(dtype or first.dtype), shape) as writer:
+            for index in tqdm(range(num_samples), desc=f"Convert '{os.path.basename(in_path)}'"):
+                writer.collect_next(load_sample(data, index), index)
+
+
+if __name__ == "__main__":
+    cf = get_config()
+    convert(cf.in_path, cf.out_path, cf.dtype)
@@ -1,8 +1,10 @@
 import argparse
 import copy
+import inspect
 import os
 import shutil
 
+import torch
 import yaml
 
 from util.dynamic_import import import_class, import_dataset_constants
@@ -102,6 +104,16 @@ def get_configuration(session_types: tuple, optimizer_choices: tuple,
     parser.add_argument("--lr_scheduler", type=str, choices=lr_scheduler_choices, help="Learning rate scheduler to use")
     parser.add_argument("--mixed_precision", action="store_true",
                         help="Use mixed precision instead of only float32.")
+    parser.add_argument("--bfloat16_inputs", action="store_true",
+                        help="Transfer features as bfloat16 to the GPU. Intended for mixed precision; "
+                             "may lose precision of features with large values.")
+    parser.add_argument("--compile", action="store_true",
+                        help="Compile model and loss function with torch.compile "
+                             "(TorchScript for PyTorch < 2.0, requiring a scriptable model).")
+    parser.add_argument("--cuda_graph", action="store_true",
+                        help="Capture training steps as CUDA graph "
+                             "(requires torch.cuda.graph with capture_error_mode). "
+                             "Can't be combined with mixed precision, gradient accumulation or --compile.")
     parser.add_argument("--profiling_batches", default=50, type=int, help="Number of batches for profiling")
     parser.add_argument("--disable_shuffle", action="store_true", help="Disables shuffling of data before training")
     parser.add_argument("--disable_logging", action="store_true", help="Disable printing status to console.")
@@ -110,6 +122,8 @@ def get_configuration(session_types: tuple, optimizer_choices: tuple,
     parser.add_argument("--fixed_seed", type=int, help="Set a fixed seed for all random functions.")
     parser.add_argument("--in_memory", action="store_true",
                         help="Load all datasets into main memory instead of mapping them.")
+    parser.add_argument("--num_workers", type=int,
+                        help="Number of worker processes for data loading. Chosen based on CPU count if unspecified.")
     parser.add_argument("--eval_session_id", type=str, help="For evaluation only: "
                                                             "evaluate specified session using its model weights.")
     config = parser.parse_args()
@@ -138,6 +152,10 @@ def get_configuration(session_types: tuple, optimizer_choices: tuple,
     elif config.test_batch_size is None:
         config.test_batch_size = config.batch_size
 
+    # If num_workers is not specified, leave two cores to the main process but don't use more than 8 workers
+    if config.num_workers is None:
+        config.num_workers = min(max(1, (os.cpu_count() or 2) - 2), 8)
+
     # if fixed seed is not set but debug mode is turned on, set a fixed seed
     if config.session_type == "debugging" and config.fixed_seed is None:
         config.fixed_seed = 1
@@ -145,6 +163,14 @@ def get_configuration(session_types: tuple, optimizer_choices: tuple,
     assert config.batch_size % config.grad_accum_step == 0, \
         "Gradient accumulation step size must be a factor of batch size"
 
+    assert not config.cuda_graph or not (config.mixed_precision or config.compile or
+                                         config.batch_size != config.grad_accum_step), \
+        "Option 'cuda_graph' can't be combined with mixed precision, gradient accumulation or 'compile'"
+    # The pin memory thread of the data loader may call CUDA functions while a graph is captured
+    assert not config.cuda_graph or (hasattr(torch.cuda, "graph") and
+                                     "capture_error_mode" in inspect.signature(torch.cuda.graph).parameters), \
+        "Option 'cuda_graph' requires a PyTorch version with torch.cuda.graph supporting 'capture_error_mode'"
+
     config.input_data = prepare_input_data_loader(config.input_data)
     config.out_path = os.path.abspath(config.out_path)
 
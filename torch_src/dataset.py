@@ -2,33 +2,52 @@ import os
 from typing import Sequence, Tuple
 
 import numpy as np
+import torch
 from torch.utils.data import Dataset
+from torch.utils.data.dataloader import default_collate
 
 from loader import DatasetLoader
 
 
+def collate(batch):
+    """
+    Collate function for data loaders of a MultiModalDataset: Batches fetched by __getitems__ are already collated,
+    lists of single samples (PyTorch < 2.0) are collated by the default collate function.
+    """
+    if type(batch) is tuple:
+        return batch
+    return default_collate(batch)
+
+
 class MultiModalDataset(Dataset):
     """
     Load data from multiple paths each using their own loader.
     """
 
-    def __init__(self, input_data: Sequence[Tuple[str, DatasetLoader]], split: str, debug=False):
+    def __init__(self, input_data: Sequence[Tuple[str, DatasetLoader]], split: str, debug=False,
+                 sequential_access: bool = True, feature_dtype: torch.dtype = None):
         """
         :param input_data: List of paths and loaders
         :param split: Split (training or validation)
+        :param sequential_access: Whether samples will be read in order (False if shuffled)
+        :param feature_dtype: If not None: floating point features are returned as tensors of this type,
+         e.g. torch.bfloat16 to halve the amount of data transferred to the GPU
         """
 
         assert len(input_data) > 0, "Must at least specify one data path"
 
         # labels data should be equal for all the input data paths
-        self.labels_data = np.load(os.path.join(input_data[0][0], f"{split}_labels.npy"))
+        self.labels_data = np.load(os.path.join(input_data[0][0], f"{split}_labels.npy")).astype(np.int64, copy=False)
         self.features_data = {}
+        self.feature_dtype = feature_dtype
 
         for input_path, input_loader in input_data:
             for file in filter(lambda f: "features" in f.name and split in f.name and f.is_file(),
                                os.scandir(input_path)):
                 feature_id = file.name[:file.name.index("_")]
-                self.features_data[feature_id] = (input_loader, input_loader.load_data(file.path))
+                data = input_loader.load_data(file.path)
+                input_loader.advise_access(data, sequential_access)
+                self.features_data[feature_id] = (input_loader, data)
 
         if debug:
             self.labels_data = self.labels_data[:100]
@@ -42,12 +61,59 @@ class MultiModalDataset(Dataset):
     def __getitem__(self, index: int):
         if len(self.features_data) == 1:
             loader, data = next(iter(self.features_data.values()))
-            features = loader.index_data_sample(data, index)
+            features = self._to_feature_dtype(loader.index_data_sample(data, index))
         else:
-            features = {k: loader.index_data_sample(data, index) for k, (loader, data) in self.features_data.items()}
+            features = {k: self._to_feature_dtype(loader.index_data_sample(data, index))
+                        for k, (loader, data) in self.features_data.items()}
         label = self.labels_data[index]
         return features, label, index
 
+    def __getitems__(self, indices: Sequence[int]) -> tuple:
+        """
+        Fetch all samples of a batch at once. Used by the DataLoader instead of __getitem__ since PyTorch 2.0.
+        The batch is returned already collated, so it must be loaded with collate_fn=collate.
+
+        :param indices: sample indices of the batch
+        :return: tuple (features, labels, indices) of batched tensors, features being a dictionary of tensors
+         (one for each modality) if multiple inputs are loaded
+        """
+        if len(self.features_data) == 1:
+            loader, data = next(iter(self.features_data.values()))
+            features = MultiModalDataset._to_batch_tensor(
+                self._to_feature_dtype(loader.index_data_batch(data, indices)))
+        else:
+            features = {k: MultiModalDataset._to_batch_tensor(
+                self._to_feature_dtype(loader.index_data_batch(data, indices)))
+                for k, (loader, data) in self.features_data.items()}
+        labels = torch.from_numpy(self.labels_data[np.asarray(indices)])
+        return features, labels, torch.as_tensor(indices)
+
+    @staticmethod
+    def _to_batch_tensor(batch) -> torch.Tensor:
+        if isinstance(batch, torch.Tensor):
+            return batch
+        if isinstance(batch, np.ndarray):
+            # Batched indexing already returns one contiguous array, which is wrapped without copying
+            return torch.from_numpy(batch)
+        return default_collate(batch)
+
+    def _to_feature_dtype(self, features):
+        if self.feature_dtype is None:
+            return features
+        if isinstance(features, list):
+            # Loaders without batched indexing return a list of samples
+            return [self._to_feature_dtype(sample) for sample in features]
+        if not isinstance(features, np.ndarray) or not np.issubdtype(features.dtype, np.floating):
+            return features
+        return torch.from_numpy(features).to(self.feature_dtype)
+
+    @property
+    def on_gpu(self) -> bool:
+        """
+        :return: True if any of the input data is kept on the GPU
+        """
+        return any(loader.on_gpu for loader, _ in self.features_data.values())
+
     def get_input_shape(self) -> dict:
         return {
             k: loader.get_sample_shape(data)
@@ -1,8 +1,27 @@
 import abc
+import mmap
+import os
+import warnings
 import zipfile
-from typing import Sequence
+from typing import Sequence, Union
 
 import numpy as np
+import torch
+
+# Samples of read-only memory mapped files are wrapped by tensors without copying them, which PyTorch warns about
+# although they are never written to
+warnings.filterwarnings("ignore", message="The given NumPy array is not writable", category=UserWarning)
+
+
+def float32_if_floating(dtype: np.dtype):
+    """
+    Floating point data is converted to float32 while loading, integer data (e.g. images) keeps its compact type
+    for the transfer to the GPU and is converted there.
+
+    :param dtype: type of the stored data
+    :return: float32 for floating point data, None otherwise
+    """
+    return np.float32 if np.issubdtype(dtype, np.floating) else None
 
 
 class DatasetLoader:
@@ -18,34 +37,102 @@ class DatasetLoader:
     def get_sample_shape(self, data) -> Sequence[int]:
         pass
 
+    def index_data_batch(self, data, indices: Sequence[int]) -> Sequence:
+        """
+        Index multiple samples at once.
+
+        :param data: loaded data
+        :param indices: sample indices
+        :return: sequence of samples in the order of the given indices
+        """
+        return [self.index_data_sample(data, index) for index in indices]
+
+    @property
+    def on_gpu(self) -> bool:
+        """
+        :return: True if the loaded data resides on the GPU and samples are returned as CUDA tensors
+        """
+        return False
+
+    def advise_access(self, data, sequential: bool):
+        """
+        Hint the operating system how loaded data will be accessed.
+
+        :param data: loaded data
+        :param sequential: True if samples will be read in order, False if in random order
+        """
+        pass
+
 
 class NumpyDatasetLoader(DatasetLoader):
     def __init__(self, **kwargs):
-        self._mmap_mode = None if kwargs.get("in_memory", False) else "r"
+        self._on_gpu = kwargs.get("on_gpu", False)
+        # Read-only mapping: unlike a private copy-on-write mapping, it isn't charged against the memory commit limit,
+        # so files larger than the available memory can be mapped
+        self._mmap_mode = None if kwargs.get("in_memory", False) or self._on_gpu else "r"
+
+    @property
+    def on_gpu(self) -> bool:
+        return self._on_gpu
 
     def load_data(self, path: str):
-        return np.load(path, self._mmap_mode)
+        data = np.load(path, self._mmap_mode)
+        if self._on_gpu:
+            # Upload the whole array once instead of copying every batch to the GPU
+            data_gpu = torch.from_numpy(data).cuda()
+            return data_gpu.float() if float32_if_floating(data.dtype) else data_gpu
+        return data
+
+    def advise_access(self, data: Union[np.ndarray, torch.Tensor], sequential: bool):
+        # Only memory mapped arrays on platforms supporting madvise (not on Windows)
+        mapped = getattr(data, "_mmap", None)
+        if mapped is None or not hasattr(mapped, "madvise"):
+            return
+        # Sequential access triggers aggressive read-ahead, random access avoids reading pages that aren't needed
+        mapped.madvise(mmap.MADV_SEQUENTIAL if sequential else mmap.MADV_RANDOM)
 
-    def index_data_sample(self, data: np.ndarray, index: int) -> np.ndarray:
-        return np.array(data[index])
+    def index_data_sample(self, data: Union[np.ndarray, torch.Tensor], index: int) -> Union[np.ndarray, torch.Tensor]:
+        if self._on_gpu:
+            return data[index]
+        return np.ascontiguousarray(data[index], dtype=float32_if_floating(data.dtype))
 
-    def get_sample_shape(self, data: np.ndarray) -> Sequence[int]:
+    def index_data_batch(self, data: Union[np.ndarray, torch.Tensor],
+                         indices: Sequence[int]) -> Union[np.ndarray, torch.Tensor]:
+        if self._on_gpu:
+            return data[torch.as_tensor(indices, device=data.device)]
+        # Reads all samples with a single fancy indexing operation into one contiguous array
+        return np.asarray(data[np.asarray(indices)], dtype=float32_if_floating(data.dtype))
+
+    def get_sample_shape(self, data: Union[np.ndarray, torch.Tensor]) -> Sequence[int]:
         return data.shape[1:]
 
 
 class ZipNumpyDatasetLoader(DatasetLoader):
+    def __init__(self, **kwargs):
+        self._zip_files = {}
+
+    def _open(self, path: str) -> zipfile.ZipFile:
+        # Zip files opened before forking would share their file offset with all worker processes,
+        # hence each process opens its own file on first access
+        key = (os.getpid(), path)
+        if key not in self._zip_files:
+            self._zip_files[key] = zipfile.ZipFile(path)
+        return self._zip_files[key]
+
     @staticmethod
     def _load_sample(data: zipfile.ZipFile, name: str) -> np.ndarray:
         with data.open(name) as file:
             # noinspection PyTypeChecker
-            return np.load(file)
+            sample = np.load(file)
+            return np.asarray(sample, dtype=float32_if_floating(sample.dtype))
 
     def load_data(self, path: str):
-        return zipfile.ZipFile(path)
+        return path
 
-    def index_data_sample(self, data: zipfile.ZipFile, index: int) -> np.ndarray:
-        return ZipNumpyDatasetLoader._load_sample(data, f"s{index}")
+    def index_data_sample(self, data: str, index: int) -> np.ndarray:
+        return ZipNumpyDatasetLoader._load_sample(self._open(data), f"s{index}")
 
-    def get_sample_shape(self, data: zipfile.ZipFile) -> Sequence[int]:
-        first = next(data.namelist())
-        return ZipNumpyDatasetLoader._load_sample(data, first).shape
+    def get_sample_shape(self, data: str) -> Sequence[int]:
+        zip_file = self._open(data)
+        first = zip_file.namelist()[0]
+        return ZipNumpyDatasetLoader._load_sample(zip_file, first).shape
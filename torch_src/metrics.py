@@ -82,12 +82,13 @@ class Mean(ScalarMetric):
 
     def update(self, val: Union[float, torch.Tensor, Sequence[torch.Tensor]] = None, **kwargs):
         n = kwargs["num_items"]
-        self._sum += val.item() * n
+        # Accumulate on the device of val, reading the value synchronizes with the GPU
+        self._sum += val.detach() * n
         self._steps += n
 
     @property
     def value(self) -> float:
-        return self._sum / self._steps
+        return float(self._sum) / self._steps
 
     def reset(self):
         self._sum = 0.
@@ -104,12 +105,12 @@ class MultiClassAccuracy(ScalarMetric):
         y_pred, y_true = val
         indices = torch.argmax(y_pred, dim=1)
         correct = torch.eq(indices, y_true).view(-1)
-        self._num_correct += torch.sum(correct).item()
+        self._num_correct += torch.sum(correct)
         self._num_examples += correct.shape[0]
 
     @property
     def value(self) -> float:
-        return self._num_correct / self._num_examples
+        return float(self._num_correct) / self._num_examples
 
     def reset(self):
         self._num_correct = 0.
@@ -128,12 +129,12 @@ class TopKAccuracy(ScalarMetric):
         sorted_indices = torch.topk(y_pred, self._k, dim=1)[1]
         expanded_y = y_true.view(-1, 1).expand(-1, self._k)
         correct = torch.sum(torch.eq(sorted_indices, expanded_y), dim=1)
-        self._num_correct += torch.sum(correct).item()
+        self._num_correct += torch.sum(correct)
         self._num_examples += correct.shape[0]
 
     @property
     def value(self) -> float:
-        return self._num_correct / self._num_examples
+        return float(self._num_correct) / self._num_examples
 
     def reset(self):
         self._num_correct = 0.
@@ -183,13 +184,8 @@ class Precision(PrecisionRecallBase):
         super().__init__(name)
 
     def update_impl(self, y_pred, y_true, correct):
-        all_positives = y_pred.sum(dim=0).type(torch.DoubleTensor)
-        if correct.sum() == 0:
-            true_positives = torch.zeros_like(all_positives)
-        else:
-            true_positives = correct.sum(dim=0)
-
-        true_positives = true_positives.type(torch.DoubleTensor)
+        all_positives = y_pred.sum(dim=0).double()
+        true_positives = correct.sum(dim=0).double()
         self._true_positives += true_positives
         self._positives += all_positives
 
@@ -199,13 +195,8 @@ class Recall(PrecisionRecallBase):
         super().__init__(name)
 
     def update_impl(self, y_pred, y_true, correct):
-        actual_positives = y_true.sum(dim=0).type(torch.DoubleTensor)
-        if correct.sum() == 0:
-            true_positives = torch.zeros_like(actual_positives)
-        else:
-            true_positives = correct.sum(dim=0)
-
-        true_positives = true_positives.type(torch.DoubleTensor)
+        actual_positives = y_true.sum(dim=0).double()
+        true_positives = correct.sum(dim=0).double()
         self._true_positives += true_positives
         self._positives += actual_positives
 
@@ -261,18 +252,22 @@ class ConfusionMatrix(VisualMetric):
         y_pred = torch.argmax(y_pred, dim=1)
         matrix_indices = self.num_classes * y_true + y_pred
         m = torch.bincount(matrix_indices, minlength=self.num_classes ** 2).reshape(self.num_classes, self.num_classes)
+        # Keep the matrix on the device of the predictions to avoid synchronizing on every update
+        if self.confusion_matrix.device != m.device:
+            self.confusion_matrix = self.confusion_matrix.to(m.device)
         self.confusion_matrix += m.to(self.confusion_matrix)
 
     @property
     def value(self):
+        confusion_matrix = self.confusion_matrix.cpu()
         if self.mode == "samples":
-            return self.confusion_matrix.to(torch.float) / self._num_samples
+            return confusion_matrix.to(torch.float) / self._num_samples
         elif self.mode == "recall":
-            return self.confusion_matrix.to(torch.float) / (self.confusion_matrix.sum(dim=1).unsqueeze(1) + 1e-15)
+            return confusion_matrix.to(torch.float) / (confusion_matrix.sum(dim=1).unsqueeze(1) + 1e-15)
         elif self.mode == "precision":
-            return self.confusion_matrix.to(torch.float) / (self.confusion_matrix.sum(dim=0) + 1e-15)
+            return confusion_matrix.to(torch.float) / (confusion_matrix.sum(dim=0) + 1e-15)
 
-        return self.confusion_matrix
+        return confusion_matrix
 
     def reset(self):
         self.confusion_matrix = torch.zeros(self.num_classes, self.num_classes, dtype=torch.int32)
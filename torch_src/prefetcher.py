@@ -0,0 +1,70 @@
+from typing import Iterable
+
+import torch
+
+
+class CUDAPrefetcher:
+    """
+    Wraps a data loader and copies the next batch to the GPU on a separate CUDA stream
+    while the current batch is being processed.
+    """
+
+    def __init__(self, loader: Iterable):
+        """
+        :param loader: data loader yielding (features, label, indices) with features being a tensor
+        or a dictionary of tensors, one for each modality
+        """
+        self._loader = loader
+        self._iterator = None
+        self._stream = torch.cuda.Stream()
+        self._next_batch = None
+
+    def __len__(self):
+        return len(self._loader)
+
+    def __iter__(self):
+        self._iterator = iter(self._loader)
+        self._preload()
+        return self
+
+    def __next__(self):
+        if self._next_batch is None:
+            raise StopIteration
+
+        current_stream = torch.cuda.current_stream()
+        current_stream.wait_stream(self._stream)
+        features, label, indices = self._next_batch
+
+        # Tensors were allocated on the copy stream but will be used on the current stream
+        for tensor in CUDAPrefetcher._tensors(features):
+            tensor.record_stream(current_stream)
+        label.record_stream(current_stream)
+
+        self._preload()
+        return features, label, indices
+
+    def _preload(self):
+        try:
+            features_batch, label_batch, indices = next(self._iterator)
+        except StopIteration:
+            self._next_batch = None
+            return
+
+        # The dataset already provides float32 features and int64 labels. Only integer features (e.g. images) and
+        # reduced precision features are transferred in their compact type and converted on the GPU;
+        # for float32 features .float() is a no-op.
+        with torch.cuda.stream(self._stream):
+            if type(features_batch) is dict:
+                features = {k: CUDAPrefetcher._to_cuda(v) for k, v in features_batch.items()}
+            else:
+                features = CUDAPrefetcher._to_cuda(features_batch)
+            label = label_batch.cuda(non_blocking=True)
+        self._next_batch = features, label, indices
+
+    @staticmethod
+    def _to_cuda(tensor: torch.Tensor) -> torch.Tensor:
+        return tensor.cuda(non_blocking=True).float()
+
+    @staticmethod
+    def _tensors(features):
+        return features.values() if type(features) is dict else (features,)
@@ -13,11 +13,16 @@ class DebuggingSession(TrainingSession):
         self.disable_checkpointing = True
 
     def _load_data(self, batch_size, test_batch_size) -> Tuple[DataLoader, DataLoader]:
-        training_data = DataLoader(MultiModalDataset(self._base_config.input_data, "train", debug=True), batch_size,
-                                   shuffle=False, drop_last=True, worker_init_fn=torch_util.set_seed)
+        feature_dtype = self.feature_dtype
+        training_data = self._create_data_loader(MultiModalDataset(self._base_config.input_data, "train", debug=True,
+                                                                   feature_dtype=feature_dtype),
+                                                 batch_size, shuffle=False, drop_last=True,
+                                                 worker_init_fn=torch_util.set_seed)
 
-        validation_data = DataLoader(MultiModalDataset(self._base_config.input_data, "val"), test_batch_size,
-                                     shuffle=False, drop_last=False, worker_init_fn=torch_util.set_seed)
+        validation_data = self._create_data_loader(MultiModalDataset(self._base_config.input_data, "val",
+                                                                     feature_dtype=feature_dtype),
+                                                   test_batch_size, shuffle=False, drop_last=False,
+                                                   worker_init_fn=torch_util.set_seed)
         return training_data, validation_data
 
     def start(self, config: dict = None, **kwargs):
@@ -18,8 +18,10 @@ class EvaluationSession(Session):
 
     def _load_data(self, test_batch_size) -> DataLoader:
         worker_init_fn = torch_util.set_seed if self._base_config.fixed_seed is not None else None
-        validation_data = DataLoader(MultiModalDataset(self._base_config.input_data, "val"),
-                                     test_batch_size, shuffle=False, drop_last=False, worker_init_fn=worker_init_fn)
+        validation_data = self._create_data_loader(MultiModalDataset(self._base_config.input_data, "val",
+                                                                     feature_dtype=self.feature_dtype),
+                                                   test_batch_size, shuffle=False, drop_last=False,
+                                                   worker_init_fn=worker_init_fn)
         return validation_data
 
     def _build_logging(self, validation_data_size: int):
@@ -53,6 +55,8 @@ class EvaluationSession(Session):
 
         model, loss_function, _, _ = self._build_model(config, data_shape, num_classes)
         model.load_state_dict(torch.load(eval_session_path))
+        if self._base_config.compile:
+            batch_processor.compile(model, loss_function)
         progress = self._build_logging(len(validation_data))
 
         # skeleton_joints, = import_dataset_constants(self._base_config.dataset, ["skeleton_joints"])
@@ -12,12 +12,18 @@ class BatchProcessor:
 
     @abc.abstractmethod
     def process_single_batch(self, model: torch.nn.Module, loss_function: torch.nn.Module, features: torch.Tensor,
-                             label: torch.Tensor, indices: torch.Tensor, update_metrics_function=None):
+                             label: torch.Tensor, indices: torch.Tensor, training: bool, update_metrics_function=None):
         pass
 
+    def compile(self, model: torch.nn.Module, loss_function: torch.nn.Module):
+        self._step_function.compile(model, loss_function)
+
     def run_optimizer_step(self, optimizer):
         return self._step_function.run_optimizer_step(optimizer)
 
+    def zero_grad(self, optimizer):
+        optimizer.zero_grad(set_to_none=True)
+
     def reset(self):
         self._step_function.reset()
 
@@ -38,6 +44,7 @@ class DefaultBatchProcessor(BatchProcessor):
                              features: Union[torch.Tensor, Dict[str, torch.Tensor]],
                              label: torch.Tensor,
                              indices: torch.Tensor,
+                             training: bool,
                              update_metrics_function=None):
         """
         Compute and calculate the loss for a single batch. If training, propagate the loss to all parameters.
@@ -47,13 +54,14 @@ class DefaultBatchProcessor(BatchProcessor):
         :param features: features tensor of len batch_size or multiple tensors in a dictionary, one for each modality
         :param label: label tensor of len batch_size
         :param indices: data sample indices for current batch
+        :param training: whether the model is trained, i.e. gradients are computed
         :param update_metrics_function: If not None: function that takes
          (loss, (y_pred, y_true), len(y_true)) to update metrics
         """
 
         y_pred, loss = self._step_function.forward(model, loss_function, features, label)
 
-        if model.training:
+        if training:
             self._step_function.backward(loss)
 
         if update_metrics_function:
@@ -61,6 +69,11 @@ class DefaultBatchProcessor(BatchProcessor):
 
 
 class GradientAccumulationBatchProcessor(BatchProcessor):
+    """
+    Splits each batch into smaller steps during training. This is only required if activations and gradients
+    of a whole batch do not fit into GPU memory at once, otherwise use the DefaultBatchProcessor.
+    """
+
     def __init__(self, step_function: Step, batch_size: int, gradient_accumulation_batch_size: int):
         super().__init__(step_function)
         assert batch_size % gradient_accumulation_batch_size == 0
@@ -73,20 +86,31 @@ class GradientAccumulationBatchProcessor(BatchProcessor):
                              features: Union[torch.Tensor, Dict[str, torch.Tensor]],
                              label: torch.Tensor,
                              indices: torch.Tensor,
+                             training: bool,
                              update_metrics_function=None):
         """
         Compute and calculate the loss for a single batch in small steps using gradient accumulation.
-        If training, propagate the loss to all parameters.
+        If training, propagate the loss to all parameters. If evaluating, nothing needs to be kept for the
+        backward pass so the whole batch is processed at once.
 
         :param model: model to train/evaluate
         :param loss_function:  function to compute loss
         :param features: features tensor of len batch_size or multiple tensors in a dictionary, one for each modality
         :param label: label tensor of len batch_size
         :param indices: data sample indices for current batch
+        :param training: whether the model is trained, i.e. gradients are computed
         :param update_metrics_function: If not None: function that takes
          (loss, (y_pred, y_true), len(y_true)) to update metrics
         """
 
+        if not training:
+            # Scale the loss like the accumulated steps so validation losses stay comparable to training losses
+            y_pred, loss = self._step_function.forward(model, loss_function, features, label,
+                                                       loss_quotient=self._gradient_accumulation_batch_size)
+            if update_metrics_function:
+                update_metrics_function(loss, (y_pred, label), model, indices)
+            return
+
         for step in range(self._steps):
             start = step * self._gradient_accumulation_batch_size
             end = start + self._gradient_accumulation_batch_size
@@ -97,13 +121,118 @@ class GradientAccumulationBatchProcessor(BatchProcessor):
                 x = features[start:end]
             y_pred, loss = self._step_function.forward(model, loss_function, x, y_true, loss_quotient=len(y_true))
 
-            if model.training:
+            if training:
                 self._step_function.backward(loss)
 
             if update_metrics_function:
                 update_metrics_function(loss, (y_pred, y_true), model, indices[start:end])
 
 
+class CUDAGraphBatchProcessor(BatchProcessor):
+    """
+    Captures forward and backward pass of a training step as a CUDA graph after a few warmup steps and
+    replays it for all following batches, which removes the CPU overhead of launching every kernel separately.
+    Requires equally shaped training batches (drop_last) and static gradient tensors that are overwritten by each
+    replay, hence gradients are not cleared after capture. Evaluation runs without the graph.
+    """
+
+    def __init__(self, step_function: Step, warmup_steps: int = 3):
+        super().__init__(step_function)
+        self._warmup_steps = warmup_steps
+        self._steps = 0
+        self._graph = None
+        self._static_features = None
+        self._static_label = None
+        self._static_output = None
+
+    def process_single_batch(self,
+                             model: torch.nn.Module,
+                             loss_function: torch.nn.Module,
+                             features: Union[torch.Tensor, Dict[str, torch.Tensor]],
+                             label: torch.Tensor,
+                             indices: torch.Tensor,
+                             training: bool,
+                             update_metrics_function=None):
+        """
+        Compute and calculate the loss for a single batch. If training, propagate the loss to all parameters
+        by replaying the captured graph.
+
+        :param model: model to train/evaluate
+        :param loss_function: function to compute loss
+        :param features: features tensor of len batch_size or multiple tensors in a dictionary, one for each modality
+        :param label: label tensor of len batch_size
+        :param indices: data sample indices for current batch
+        :param training: whether the model is trained, i.e. gradients are computed
+        :param update_metrics_function: If not None: function that takes
+         (loss, (y_pred, y_true), len(y_true)) to update metrics
+        """
+
+        if not training:
+            y_pred, loss = self._step_function.forward(model, loss_function, features, label)
+        elif self._steps < self._warmup_steps:
+            y_pred, loss = self._warmup(model, loss_function, features, label)
+        else:
+            if self._graph is None:
+                self._capture(model, loss_function, features, label)
+            self._copy_to_static_inputs(features, label)
+            self._graph.replay()
+            y_pred, loss = self._static_output
+
+        if update_metrics_function:
+            update_metrics_function(loss, (y_pred, label), model, indices)
+
+    def _warmup(self, model: torch.nn.Module, loss_function: torch.nn.Module,
+                features: Union[torch.Tensor, Dict[str, torch.Tensor]], label: torch.Tensor):
+        # Warmup has to run on a side stream before capturing
+        stream = torch.cuda.Stream()
+        stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(stream):
+            y_pred, loss = self._step_function.forward(model, loss_function, features, label)
+            self._step_function.backward(loss)
+        torch.cuda.current_stream().wait_stream(stream)
+        self._steps += 1
+        return y_pred, loss
+
+    def _capture(self, model: torch.nn.Module, loss_function: torch.nn.Module,
+                 features: Union[torch.Tensor, Dict[str, torch.Tensor]], label: torch.Tensor):
+        # Gradients were released by zero_grad, so the backward pass allocates them from the graph's memory pool
+        if type(features) is dict:
+            self._static_features = {k: v.clone() for k, v in features.items()}
+        else:
+            self._static_features = features.clone()
+        self._static_label = label.clone()
+        self._graph = torch.cuda.CUDAGraph()
+        # In the default "global" mode, CUDA calls of other threads like the data loader's pin memory thread
+        # would invalidate the capture
+        with torch.cuda.graph(self._graph, capture_error_mode="thread_local"):
+            y_pred, loss = self._step_function.forward(model, loss_function, self._static_features,
+                                                       self._static_label)
+            self._step_function.backward(loss)
+        self._static_output = y_pred, loss
+
+    def _copy_to_static_inputs(self, features: Union[torch.Tensor, Dict[str, torch.Tensor]], label: torch.Tensor):
+        assert label.shape == self._static_label.shape, "CUDA graphs require equally shaped training batches"
+        if type(features) is dict:
+            for k, v in features.items():
+                self._static_features[k].copy_(v, non_blocking=True)
+        else:
+            self._static_features.copy_(features, non_blocking=True)
+        self._static_label.copy_(label, non_blocking=True)
+
+    def zero_grad(self, optimizer):
+        # Replaying the graph overwrites the captured gradient tensors, which must not be released
+        if self._graph is None:
+            super().zero_grad(optimizer)
+
+    def reset(self):
+        super().reset()
+        self._steps = 0
+        self._graph = None
+        self._static_features = None
+        self._static_label = None
+        self._static_output = None
+
+
 def get_batch_processor_from_config(base_args, config: dict):
     batch_size = config.get("batch_size", base_args.batch_size)
     grad_accum_step = config.get("grad_accum_step", base_args.grad_accum_step)
@@ -112,6 +241,8 @@ def get_batch_processor_from_config(base_args, config: dict):
     step = MixedPrecisionStep() if use_mixed_precision else DefaultStep()
     if use_gradient_accumulation:
         batch_processor = GradientAccumulationBatchProcessor(step, batch_size, grad_accum_step)
+    elif base_args.cuda_graph:
+        batch_processor = CUDAGraphBatchProcessor(step)
     else:
         batch_processor = DefaultBatchProcessor(step)
     return batch_processor
@@ -4,11 +4,35 @@ import torch
 from torch.cuda.amp import autocast, GradScaler
 
 
+class ModelWithLoss(torch.nn.Module):
+    """
+    Computes model output and loss in a single module so that both can be compiled together.
+    """
+
+    def __init__(self, model: torch.nn.Module, loss_function: torch.nn.Module):
+        super().__init__()
+        self.model = model
+        self.loss_function = loss_function
+
+    def forward(self, features: torch.Tensor, label: torch.Tensor):
+        y_pred = self.model(features)
+        return y_pred, self.loss_function(y_pred, label)
+
+
 class Step:
     """
     Runs forward and backward pass on a model for a single step.
     """
 
+    def compile(self, model: torch.nn.Module, loss_function: torch.nn.Module):
+        """
+        Compile model and loss function to speed up subsequent forward passes of the given model.
+
+        :param model: model that will be passed to forward
+        :param loss_function: loss function that will be passed to forward
+        """
+        pass
+
     @abc.abstractmethod
     def forward(self, model: torch.nn.Module, loss_function: torch.nn.Module, features: torch.Tensor,
                 label: torch.Tensor, loss_quotient: int = 1):
@@ -36,11 +60,29 @@ class Step:
 
 
 class DefaultStep(Step):
+    def __init__(self):
+        self._compiled = None
+
+    def compile(self, model: torch.nn.Module, loss_function: torch.nn.Module):
+        # Parameters and buffers are shared with the original model
+        model_with_loss = ModelWithLoss(model, loss_function)
+        if hasattr(torch, "compile"):
+            # Fixed batch shapes during training (drop_last) allow replaying CUDA graphs
+            self._compiled = torch.compile(model_with_loss, mode="reduce-overhead")
+        else:
+            self._compiled = torch.jit.script(model_with_loss)
+
     def forward(self, model: torch.nn.Module, loss_function: torch.nn.Module, features: torch.Tensor,
                 label: torch.Tensor, loss_quotient: int = 1):
-        y_pred = model(features)
-        loss = loss_function(y_pred, label) / loss_quotient
-        return y_pred, loss
+        if self._compiled is None:
+            y_pred = model(features)
+            loss = loss_function(y_pred, label)
+        else:
+            # The compiled module keeps its own training flag
+            if self._compiled.training != model.training:
+                self._compiled.train(model.training)
+            y_pred, loss = self._compiled(features, label)
+        return y_pred, loss / loss_quotient
 
     def backward(self, loss: torch.Tensor):
         loss.backward()
@@ -49,7 +91,7 @@ class DefaultStep(Step):
         optimizer.step()
 
     def reset(self):
-        pass
+        self._compiled = None
 
 
 class MixedPrecisionStep(Step):
@@ -57,6 +99,9 @@ class MixedPrecisionStep(Step):
         self._inner = DefaultStep()
         self._loss_scale = GradScaler()
 
+    def compile(self, model: torch.nn.Module, loss_function: torch.nn.Module):
+        self._inner.compile(model, loss_function)
+
     def forward(self, model: torch.nn.Module, loss_function: torch.nn.Module, features: torch.Tensor,
                 label: torch.Tensor, loss_quotient: int = 1):
         with autocast():
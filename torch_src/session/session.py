@@ -7,7 +7,9 @@ from torch.utils.data import DataLoader
 
 import session_helper
 from config import copy_configuration_to_output
+from dataset import MultiModalDataset, collate
 from metrics import MultiClassAccuracy, TopKAccuracy, SimpleMetric, ConfusionMatrix, AccuracyBarChart, Mean
+from prefetcher import CUDAPrefetcher
 from progress import ProgressLogger, MetricsContainer
 from session.procedures.batch_train import BatchProcessor
 from util.dynamic_import import import_model, import_dataset_constants
@@ -32,6 +34,13 @@ class Session:
 
         self.disable_logging = self._base_config.disable_logging
         self.disable_checkpointing = self._base_config.disable_checkpointing
+        # Features are converted back to float32 on the GPU, reduced precision only applies to the transfer
+        self.feature_dtype = torch.bfloat16 if self._base_config.bfloat16_inputs else None
+
+        # Let cuDNN search for the fastest algorithms unless results should be reproducible
+        torch.backends.cudnn.benchmark = self._base_config.fixed_seed is None
+        torch.backends.cuda.matmul.allow_tf32 = True
+        torch.backends.cudnn.allow_tf32 = True
 
     def _build_model(self, config: dict, data_shape: tuple, num_classes: int) -> tuple:
         """
@@ -57,6 +66,34 @@ class Session:
                                                                      **config["lr_scheduler_args"])
         return model, loss_function, optimizer, lr_scheduler
 
+    def _create_data_loader(self, dataset: MultiModalDataset, batch_size: int, shuffle: bool, drop_last: bool,
+                            worker_init_fn=None) -> DataLoader:
+        """
+        Create a data loader that fetches batches in background worker processes and pins them
+        for asynchronous transfer to the GPU. Datasets that already reside on the GPU are loaded
+        in the main process since CUDA tensors can neither be shared with workers nor pinned.
+
+        :param dataset: dataset to load batches from
+        :param batch_size: batch size
+        :param shuffle: whether to reshuffle the data at every epoch
+        :param drop_last: whether to drop the last incomplete batch
+        :param worker_init_fn: function called in each worker process on startup
+        :return: data loader
+        """
+        on_gpu = dataset.on_gpu
+        num_workers = 0 if on_gpu else self._base_config.num_workers
+        worker_args = {}
+        if num_workers > 0:
+            # Keep workers alive between epochs; a higher prefetch factor only costs memory
+            worker_args = {"prefetch_factor": 2, "persistent_workers": True}
+        # Worker batches are passed through shared memory and the loader's pinning thread copies each batch into
+        # page-locked memory from PyTorch's caching host allocator, which recycles blocks once their transfers
+        # completed.
+        # A custom pinned staging buffer would neither survive the transfer between processes nor be safe to
+        # reuse while asynchronous copies of prefetched batches are still pending.
+        return DataLoader(dataset, batch_size, shuffle=shuffle, drop_last=drop_last, num_workers=num_workers,
+                          pin_memory=not on_gpu, worker_init_fn=worker_init_fn, collate_fn=collate, **worker_args)
+
     def _make_paths(self):
         """
         Create paths for log files and checkpoints.
@@ -96,8 +133,14 @@ class Session:
         print("Logs will be written to:", self.log_path)
         print("Model checkpoints will be written to:", self.checkpoint_path)
         if model:
-            num_trainable_params = sum(p.numel() for p in model.parameters() if p.requires_grad)
+            num_params = num_trainable_params = 0
+            for p in model.parameters():
+                n = p.numel()
+                num_params += n
+                if p.requires_grad:
+                    num_trainable_params += n
             print(f"Model - Trainable parameters: {num_trainable_params:n}")
+            print(f"Model - Total parameters: {num_params:n}")
             if kwargs.get("print_model", False):
                 print(model)
 
@@ -159,50 +202,50 @@ class Session:
 
     @staticmethod
     def train_epoch(batch_processor: BatchProcessor, model: torch.nn.Module, loss_function: torch.nn.Module,
-                    dataset: DataLoader, optimizer, progress: ProgressLogger, metrics: MetricsContainer):
+                    dataset: DataLoader, optimizer, progress: ProgressLogger, metrics: MetricsContainer,
+                    progress_interval: int = 10):
         """
         Train a single epoch by running over all training batches.
+        Metrics are formatted only every progress_interval batches since reading them synchronizes with the GPU.
         """
         model.train()
+        batch_processor.zero_grad(optimizer)
+        update_metrics = metrics.update_training
+        num_batches = len(dataset)
+        last_progress_step = 0
 
-        for features_batch, label_batch, indices in dataset:
-            with torch.no_grad():
-                if type(features_batch) is dict:
-                    features = {k: v.float().cuda() for k, v in features_batch.items()}
-                else:
-                    features = features_batch.float().cuda()
-                label = label_batch.long().cuda()
-
-            # Clear gradients for each parameter
-            optimizer.zero_grad()
+        for step, (features, label, indices) in enumerate(CUDAPrefetcher(dataset), 1):
             # Compute model and calculate loss
-            batch_processor.process_single_batch(model, loss_function, features, label, indices,
-                                                 metrics.update_training)
-            # Update weights
+            batch_processor.process_single_batch(model, loss_function, features, label, indices, True, update_metrics)
+            # Update weights (skipped by the loss scaler if gradients contain infs or NaNs)
             batch_processor.run_optimizer_step(optimizer)
+            # Clear gradients for each parameter, releasing their memory before the next forward pass
+            batch_processor.zero_grad(optimizer)
             # Update progress bar
-            if progress:
-                progress.update_epoch_mode(0, metrics=metrics.format_training())
+            if progress and (step % progress_interval == 0 or step == num_batches):
+                progress.update_epoch_mode(0, step - last_progress_step, metrics=metrics.format_training())
+                last_progress_step = step
 
     @staticmethod
     def validate_epoch(batch_processor: BatchProcessor, model: torch.nn.Module, loss_function: torch.nn.Module,
-                       dataset: DataLoader, progress: ProgressLogger, metrics: MetricsContainer, mode: int = 1):
+                       dataset: DataLoader, progress: ProgressLogger, metrics: MetricsContainer, mode: int = 1,
+                       progress_interval: int = 10):
         """
         Validate a single epoch by running over all validation batches.
+        Metrics are formatted only every progress_interval batches since reading them synchronizes with the GPU.
         """
         model.eval()
+        update_metrics = metrics.update_validation
+        num_batches = len(dataset)
+        last_progress_step = 0
         with torch.no_grad():
-            for features_batch, label_batch, indices in dataset:
-                if type(features_batch) is dict:
-                    features = {k: v.float().cuda() for k, v in features_batch.items()}
-                else:
-                    features = features_batch.float().cuda()
-                label = label_batch.long().cuda()
-                batch_processor.process_single_batch(model, loss_function, features, label, indices,
-                                                     metrics.update_validation)
+            for step, (features, label, indices) in enumerate(CUDAPrefetcher(dataset), 1):
+                batch_processor.process_single_batch(model, loss_function, features, label, indices, False,
+                                                     update_metrics)
                 # Update progress bar
-                if progress:
-                    progress.update_epoch_mode(mode, metrics=metrics.format_all())
+                if progress and (step % progress_interval == 0 or step == num_batches):
+                    progress.update_epoch_mode(mode, step - last_progress_step, metrics=metrics.format_all())
+                    last_progress_step = step
 
     def __str__(self):
         return self.session_id
@@ -18,11 +18,17 @@ class TrainingSession(Session):
     def _load_data(self, batch_size, test_batch_size) -> Tuple[DataLoader, DataLoader]:
         shuffle = not self._base_config.disable_shuffle
         worker_init_fn = torch_util.set_seed if self._base_config.fixed_seed is not None else None
-        training_data = DataLoader(MultiModalDataset(self._base_config.input_data, "train"), batch_size,
-                                   shuffle=shuffle, drop_last=True, worker_init_fn=worker_init_fn)
-
-        validation_data = DataLoader(MultiModalDataset(self._base_config.input_data, "val"),
-                                     test_batch_size, shuffle=False, drop_last=False, worker_init_fn=worker_init_fn)
+        feature_dtype = self.feature_dtype
+        training_data = self._create_data_loader(MultiModalDataset(self._base_config.input_data, "train",
+                                                                   sequential_access=not shuffle,
+                                                                   feature_dtype=feature_dtype),
+                                                 batch_size, shuffle=shuffle, drop_last=True,
+                                                 worker_init_fn=worker_init_fn)
+
+        validation_data = self._create_data_loader(MultiModalDataset(self._base_config.input_data, "val",
+                                                                     feature_dtype=feature_dtype),
+                                                   test_batch_size, shuffle=False, drop_last=False,
+                                                   worker_init_fn=worker_init_fn)
         return training_data, validation_data
 
     def _build_logging(self, batch_processor: BatchProcessor, epochs: int, training_data_size: int,
@@ -74,6 +80,8 @@ class TrainingSession(Session):
 
         config = session_helper.prepare_learning_rate_scheduler_args(config, epochs, len(training_data))
         model, loss_function, optimizer, lr_scheduler = self._build_model(config, data_shape, num_classes)
+        if self._base_config.compile:
+            batch_processor.compile(model, loss_function)
         progress, cp_manager = self._build_logging(batch_processor, epochs, len(training_data),
                                                    len(validation_data), state_dict_objects={
                 "model": model,